@@ -1,123 +1,767 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import folium
+from folium.plugins import FastMarkerCluster
+import numpy as np
+try:
+    import numba
+except ImportError:  # optional: speeds up POI distance sorting
+    numba = None
 import webbrowser
 import os
 import sqlite3
+import threading
+import time
+import math
+import concurrent.futures
 from datetime import datetime
 import requests
-from typing import Tuple, List, Optional, Dict
+import ijson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Tuple, List, Optional, Dict, Callable
+from dataclasses import dataclass
 import json
+import re
+import string
+import hashlib
+import gzip
+import tempfile
+import shutil
+import functools
+from collections import OrderedDict
+
+EARTH_RADIUS_KM = 6371.0
+MAP_CACHE_DIR = "map_cache"
+MAX_CACHED_MAPS = 64
+KM_PER_DEGREE = 111.0
+# POIs are mirrored locally in square tiles of this size (~2 km)
+POI_TILE_DEG = 0.02
+MAX_POI_TILES = 256
+# Cached tiles older than this are fetched again so OSM edits show up
+POI_TILE_TTL = 7 * 24 * 3600
+# Hottest geocode / reverse geocode results kept in memory in front of SQLite
+MEMORY_CACHE_SIZE = 1024
+# Web Mercator tiles stop here; quadkeys beyond it collapse into the edge row
+MERCATOR_MAX_LAT = 85.05112878
+# Quiet period before a button press (or future key-up) actually fires a request
+DEBOUNCE_MS = 400
+HISTORY_PAGE_SIZE = 50
+# "latitude,longitude" with optional surrounding whitespace
+COORDINATE_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+# Amenities inside a (south, west, north, east) bounding box
+OVERPASS_QUERY_TEMPLATE = string.Template(
+    '[out:json];'
+    '('
+    'node["amenity"]($south,$west,$north,$east);'
+    'way["amenity"]($south,$west,$north,$east);'
+    'relation["amenity"]($south,$west,$north,$east);'
+    ');'
+    'out center;'
+)
+
+# Builds each POI marker client-side from a [lat, lon, label] row
+POI_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2]);
+    return marker;
+};
+"""
 
 # -------------------- Database Operations -------------------- #
 class GeolocationDatabase:
     """Handles all database operations for the geolocation app."""
     
-    def __init__(self):
-        self.conn = sqlite3.connect('geolocation_history.db')
+    # Hot-path statements, kept as constants so sqlite3's statement cache reuses them
+    _INSERT_SEARCH = 'INSERT INTO search_history (query, result, lat, lon) VALUES (?, ?, ?, ?)'
+    _SELECT_GEOCODE = 'SELECT lat, lon FROM geocode_cache WHERE query = ?'
+    _INSERT_GEOCODE = 'INSERT OR REPLACE INTO geocode_cache (query, lat, lon, address) VALUES (?, ?, ?, ?)'
+    _SELECT_REVERSE = 'SELECT address FROM reverse_cache WHERE qk = ?'
+    _INSERT_REVERSE = 'INSERT OR REPLACE INTO reverse_cache (qk, address) VALUES (?, ?)'
+    
+    def __init__(self, path: str = 'geolocation_history.db'):
+        self.path = path
+        # Each thread gets its own connection to the same file; WAL lets them work concurrently
+        self._tls = threading.local()
+        # Every connection opened, so they can all be closed on shutdown
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self.create_tables()
     
+    def _conn(self) -> sqlite3.Connection:
+        """Returns the calling thread's connection, opening it on first use."""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+            self._apply_pragmas(conn)
+            self._tls.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """Closes the connections opened by every thread."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+    
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection):
+        """Tunes a connection for fast, concurrent access."""
+        # WAL lets reads proceed during writes; NORMAL sync is still crash-safe under WAL
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=268435456')
+    
     def create_tables(self):
         """Creates the necessary database tables if they don't exist."""
-        with self.conn:
-            self.conn.execute('''
+        conn = self._conn()
+        with conn:
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS search_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     query TEXT NOT NULL,
                     result TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    lat REAL,
+                    lon REAL
                 )
             ''')
+            # Databases created before coordinates had their own columns
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(search_history)')]
+            if 'lat' not in columns:
+                conn.execute('ALTER TABLE search_history ADD COLUMN lat REAL')
+                conn.execute('ALTER TABLE search_history ADD COLUMN lon REAL')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_hist_ts ON search_history(timestamp DESC, id DESC)'
+            )
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    query TEXT PRIMARY KEY,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    address TEXT,
+                    ts DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            # The primary key already indexes query; drop the redundant index older versions created
+            conn.execute('DROP INDEX IF EXISTS idx_geocode_cache_query')
+            # Earlier versions keyed reverse_cache by rounded coordinates; it is only a cache, so rebuild it
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(reverse_cache)')]
+            if columns and 'qk' not in columns:
+                conn.execute('DROP TABLE reverse_cache')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS reverse_cache (
+                    qk TEXT PRIMARY KEY,
+                    address TEXT NOT NULL
+                )
+            ''')
+            # Local mirror of Overpass POIs, spatially indexed and grouped by tile
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS poi_rtree
+                USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS poi_meta (
+                    id INTEGER PRIMARY KEY,
+                    tile_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL
+                )
+            ''')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_poi_meta_tile ON poi_meta(tile_id)'
+            )
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS poi_tiles (
+                    tile_id TEXT PRIMARY KEY,
+                    last_used REAL NOT NULL,
+                    fetched_at REAL NOT NULL DEFAULT 0
+                )
+            ''')
+            # Tiles cached before fetched_at existed count as stale
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(poi_tiles)')]
+            if 'fetched_at' not in columns:
+                conn.execute('ALTER TABLE poi_tiles ADD COLUMN fetched_at REAL NOT NULL DEFAULT 0')
     
-    def add_search(self, query: str, result: str):
-        """Adds a new search record to the history."""
-        with self.conn:
-            self.conn.execute(
-                'INSERT INTO search_history (query, result) VALUES (?, ?)',
-                (query, result)
+    def add_search(self, query: str, result: str, lat: Optional[float] = None, lon: Optional[float] = None):
+        """Adds a new search record to the history, with the searched coordinates when known."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                self._INSERT_SEARCH,
+                (query, result, lat, lon)
             )
     
-    def get_recent_searches(self, limit: int = 5) -> List[tuple]:
-        """Retrieves the most recent searches from the database."""
-        cursor = self.conn.execute(
-            'SELECT query, result, timestamp FROM search_history ORDER BY timestamp DESC LIMIT ?',
-            (limit,)
-        )
+    def get_recent_searches(self, limit: int = 5, before: Optional[Tuple[str, int]] = None) -> List[tuple]:
+        """Retrieves the most recent (query, result, timestamp, lat, lon, id) searches.
+        
+        Pass the (timestamp, id) of the last row already shown as before to get the
+        next page; unlike an offset, this is unaffected by searches added meanwhile.
+        """
+        conn = self._conn()
+        if before is None:
+            cursor = conn.execute(
+                'SELECT query, result, timestamp, lat, lon, id FROM search_history '
+                'ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (limit,)
+            )
+        else:
+            cursor = conn.execute(
+                'SELECT query, result, timestamp, lat, lon, id FROM search_history '
+                'WHERE (timestamp, id) < (?, ?) '
+                'ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (*before, limit)
+            )
+        return cursor.fetchall()
+    
+    def get_cached_geocode(self, query: str) -> Optional[Tuple[float, float]]:
+        """Looks up previously geocoded coordinates for a normalized query."""
+        conn = self._conn()
+        row = conn.execute(
+            self._SELECT_GEOCODE,
+            (query,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+    
+    def cache_geocode(self, query: str, lat: float, lon: float, address: Optional[str] = None):
+        """Stores geocoded coordinates for a normalized query."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                self._INSERT_GEOCODE,
+                (query, lat, lon, address)
+            )
+    
+    def get_cached_reverse(self, qk: str) -> Optional[str]:
+        """Looks up a previously resolved address for a quadkey cell."""
+        conn = self._conn()
+        row = conn.execute(
+            self._SELECT_REVERSE,
+            (qk,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def cache_reverse(self, qk: str, address: str):
+        """Stores a resolved address for a quadkey cell."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                self._INSERT_REVERSE,
+                (qk, address)
+            )
+    
+    def clear_geocode_caches(self):
+        """Deletes all cached geocode and reverse geocode results."""
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM geocode_cache')
+            conn.execute('DELETE FROM reverse_cache')
+    
+    def get_fresh_poi_tiles(self, tile_ids: List[str]) -> set:
+        """Returns which of the given POI tiles are cached and fresh, marking them as recently used."""
+        conn = self._conn()
+        now = time.time()
+        placeholders = ", ".join("?" * len(tile_ids))
+        fresh = {row[0] for row in conn.execute(
+            f'SELECT tile_id FROM poi_tiles WHERE tile_id IN ({placeholders}) AND fetched_at > ?',
+            (*tile_ids, now - POI_TILE_TTL)
+        )}
+        if fresh:
+            with conn:
+                conn.execute(
+                    f'UPDATE poi_tiles SET last_used = ? WHERE tile_id IN ({", ".join("?" * len(fresh))})',
+                    (now, *fresh)
+                )
+        return fresh
+    
+    def store_poi_tiles(self, tiles: Dict[str, List[Dict]]):
+        """Stores freshly fetched POI tiles, replacing stale copies, and evicts the least recently used ones."""
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            # Take the write lock up front so the freshness check and the replacement are atomic
+            conn.execute('BEGIN IMMEDIATE')
+            for tile_id, pois in tiles.items():
+                # Another thread may have stored the same tile in the meantime
+                row = conn.execute('SELECT fetched_at FROM poi_tiles WHERE tile_id = ?', (tile_id,)).fetchone()
+                if row and row[0] > now - POI_TILE_TTL:
+                    continue
+                conn.execute(
+                    'DELETE FROM poi_rtree WHERE id IN (SELECT id FROM poi_meta WHERE tile_id = ?)',
+                    (tile_id,)
+                )
+                conn.execute('DELETE FROM poi_meta WHERE tile_id = ?', (tile_id,))
+                conn.execute(
+                    'INSERT OR REPLACE INTO poi_tiles (tile_id, last_used, fetched_at) VALUES (?, ?, ?)',
+                    (tile_id, now, now)
+                )
+                for poi in pois:
+                    cursor = conn.execute(
+                        'INSERT INTO poi_meta (tile_id, name, type, lat, lon) VALUES (?, ?, ?, ?, ?)',
+                        (tile_id, poi['name'], poi['type'], poi['lat'], poi['lon'])
+                    )
+                    conn.execute(
+                        'INSERT INTO poi_rtree (id, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)',
+                        (cursor.lastrowid, poi['lat'], poi['lat'], poi['lon'], poi['lon'])
+                    )
+            
+            evicted = [row[0] for row in conn.execute(
+                'SELECT tile_id FROM poi_tiles ORDER BY last_used DESC LIMIT -1 OFFSET ?',
+                (MAX_POI_TILES,)
+            )]
+            for tile_id in evicted:
+                conn.execute(
+                    'DELETE FROM poi_rtree WHERE id IN (SELECT id FROM poi_meta WHERE tile_id = ?)',
+                    (tile_id,)
+                )
+                conn.execute('DELETE FROM poi_meta WHERE tile_id = ?', (tile_id,))
+                conn.execute('DELETE FROM poi_tiles WHERE tile_id = ?', (tile_id,))
+    
+    def get_pois_in_bbox(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> List[tuple]:
+        """Retrieves cached (name, type, lat, lon) POIs inside a bounding box using the R-tree index."""
+        conn = self._conn()
+        cursor = conn.execute('''
+            SELECT m.name, m.type, m.lat, m.lon
+            FROM poi_rtree r JOIN poi_meta m ON m.id = r.id
+            WHERE r.min_lat <= ? AND r.max_lat >= ? AND r.min_lon <= ? AND r.max_lon >= ?
+        ''', (max_lat, min_lat, max_lon, min_lon))
         return cursor.fetchall()
 
+# -------------------- Data Types -------------------- #
+@dataclass
+class POIBatch:
+    """Points of interest stored column-wise, so coordinates can be processed as arrays."""
+    lats: np.ndarray
+    lons: np.ndarray
+    names: List[str]
+    types: List[str]
+    distances: np.ndarray
+    
+    @classmethod
+    def empty(cls) -> 'POIBatch':
+        """Returns a batch containing no POIs."""
+        return cls(
+            lats=np.empty(0, dtype=np.float32),
+            lons=np.empty(0, dtype=np.float32),
+            names=[],
+            types=[],
+            distances=np.empty(0)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.names)
+
+# -------------------- Rate Limiting -------------------- #
+class RateLimiter:
+    """Enforces a minimum interval between calls, shared across threads."""
+    
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.last_call = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Blocks until at least min_interval seconds have passed since the previous call."""
+        with self.lock:
+            wait = self.min_interval - (time.monotonic() - self.last_call)
+            if wait > 0:
+                time.sleep(wait)
+            self.last_call = time.monotonic()
+
+# -------------------- Caching -------------------- #
+class LRUCache:
+    """Thread-safe in-memory cache that discards the least recently used entries."""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        """Returns the cached value for key, or None if it is not cached."""
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+    
+    def put(self, key, value):
+        """Caches a value, evicting the oldest entry when full."""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        """Removes every entry."""
+        with self.lock:
+            self.entries.clear()
+
 # -------------------- Geolocation Service -------------------- #
+if numba is not None:
+    @numba.njit(cache=True, fastmath=True)
+    def _haversine_nb(lat1, lon1, lats, lons, out):
+        """Writes haversine distances (in kilometers) from one point to each (lats[i], lons[i]) into out."""
+        phi1 = math.radians(lat1)
+        lam1 = math.radians(lon1)
+        cos_phi1 = math.cos(phi1)
+        for i in range(lats.shape[0]):
+            phi2 = math.radians(lats[i])
+            a = (math.sin((phi2 - phi1) / 2) ** 2
+                 + cos_phi1 * math.cos(phi2) * math.sin((math.radians(lons[i]) - lam1) / 2) ** 2)
+            out[i] = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
 class GeolocationService:
     """Provides core geolocation functionality including geocoding and distance calculations."""
     
     def __init__(self):
         self.geolocator = Nominatim(user_agent="my_geolocation_app")
         self.db = GeolocationDatabase()
+        self.http = self._create_session()
+        # Nominatim's usage policy allows at most one request per second
+        self.rate_limiter = RateLimiter(min_interval=1.0)
+        self.overpass_limiter = RateLimiter(min_interval=2.0)
+        # Dedicated pool so cache misses in geocode_many can overlap their round-trips
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # Per-instance LRU caches over the SQLite-backed lookups; misses are never memoized
+        self._geocode_memory = LRUCache(MEMORY_CACHE_SIZE)
+        self._reverse_memory = LRUCache(MEMORY_CACHE_SIZE)
+    
+    def close(self):
+        """Cancels queued lookups and releases network and database resources."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.http.close()
+        self.db.close()
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Creates a pooled HTTP session that keeps connections alive between requests."""
+        session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=frozenset(['GET', 'POST'])  # Overpass queries are POSTs
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'User-Agent': 'my_geolocation_app/1.0'})
+        return session
+    
+    @staticmethod
+    def _normalize_query(address: str) -> str:
+        """Normalizes an address so equivalent queries share a cache entry."""
+        return " ".join(address.lower().split())
+    
+    def clear_cache(self):
+        """Drops all cached geocoding results, both in memory and on disk."""
+        self.db.clear_geocode_caches()
+        self._geocode_memory.clear()
+        self._reverse_memory.clear()
     
     def geocode(self, address: str) -> Optional[Tuple[float, float]]:
         """Converts an address into geographic coordinates."""
+        key = self._normalize_query(address)
+        coords = self._geocode_memory.get(key)
+        if coords is None:
+            coords = self._lookup_geocode(key)
+            if coords:
+                self._geocode_memory.put(key, coords)
+        if coords:
+            self.db.add_search(address, f"{coords[0]}, {coords[1]}", *coords)
+        return coords
+    
+    def _lookup_geocode(self, key: str) -> Optional[Tuple[float, float]]:
+        """Resolves a normalized address from the SQLite cache, falling back to Nominatim."""
+        cached = self.db.get_cached_geocode(key)
+        if cached:
+            return cached
         try:
-            location = self.geolocator.geocode(address)
+            self.rate_limiter.acquire()
+            location = self.geolocator.geocode(key)
             if location:
-                self.db.add_search(address, f"{location.latitude}, {location.longitude}")
+                self.db.cache_geocode(key, location.latitude, location.longitude, location.address)
                 return (location.latitude, location.longitude)
             return None
         except (GeocoderTimedOut, GeocoderServiceError) as e:
             raise Exception(f"Geocoding error: {str(e)}")
     
+    def geocode_many(self, addresses: List[str]) -> List[Optional[Tuple[float, float]]]:
+        """Geocodes several addresses, returning results in the same order.
+        
+        Cached addresses are answered immediately; the remaining lookups are
+        dispatched together so the rate limiter can issue them back-to-back.
+        """
+        results = {}
+        for address in addresses:
+            key = self._normalize_query(address)
+            if key in results:
+                continue
+            # Check the in-memory tier first so hot keys skip SQLite entirely
+            if self._geocode_memory.get(key) or self.db.get_cached_geocode(key):
+                results[key] = self.geocode(address)
+            else:
+                results[key] = self.executor.submit(self.geocode, address)
+        return [
+            result.result() if isinstance(result, concurrent.futures.Future) else result
+            for result in (results[self._normalize_query(address)] for address in addresses)
+        ]
+    
+    @staticmethod
+    def _quadkey(lat: float, lon: float, z: int = 22) -> str:
+        """Returns the Bing Maps quadkey of the tile containing a point at zoom level z.
+        
+        At the default level a tile is roughly 10 m across, so nearby GPS
+        samples map to the same key.
+        """
+        lat = min(max(lat, -MERCATOR_MAX_LAT), MERCATOR_MAX_LAT)
+        sin_lat = math.sin(math.radians(lat))
+        x = (lon + 180) / 360
+        y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+        n = 1 << z
+        tile_x = min(max(int(x * n), 0), n - 1)
+        tile_y = min(max(int(y * n), 0), n - 1)
+        digits = []
+        for i in range(z, 0, -1):
+            mask = 1 << (i - 1)
+            digits.append(str((1 if tile_x & mask else 0) + (2 if tile_y & mask else 0)))
+        return "".join(digits)
+    
     def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
         """Converts geographic coordinates into an address."""
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("Latitude must be between -90 and 90 and longitude between -180 and 180")
+        
+        # Quadkeys only distinguish points inside the Mercator range, so cache only there
+        qk = self._quadkey(lat, lon) if abs(lat) <= MERCATOR_MAX_LAT else None
+        address = self._reverse_memory.get(qk) if qk else None
+        if address is None:
+            address = self._lookup_reverse(qk, lat, lon)
+            if qk and address:
+                self._reverse_memory.put(qk, address)
+        if address:
+            self.db.add_search(f"{lat}, {lon}", address, lat, lon)
+        return address
+    
+    def _lookup_reverse(self, qk: Optional[str], lat: float, lon: float) -> Optional[str]:
+        """Resolves a point from the SQLite cache for its quadkey cell, falling back to Nominatim."""
+        if qk:
+            cached = self.db.get_cached_reverse(qk)
+            if cached:
+                return cached
         try:
+            self.rate_limiter.acquire()
             location = self.geolocator.reverse((lat, lon))
             if location:
-                self.db.add_search(f"{lat}, {lon}", location.address)
+                if qk:
+                    self.db.cache_reverse(qk, location.address)
                 return location.address
             return None
         except (GeocoderTimedOut, GeocoderServiceError) as e:
             raise Exception(f"Reverse geocoding error: {str(e)}")
     
+    @staticmethod
+    def calculate_distance_batch(coords1, coords2) -> np.ndarray:
+        """Calculates haversine distances (in kilometers) between arrays of (lat, lon) points.
+        
+        Both inputs have shape (..., 2) and are broadcast against each other, so
+        one point against N points, N against N, or N against M (via a new axis) all
+        run as a single vectorized operation.
+        """
+        p1 = np.radians(np.asarray(coords1, dtype=float))
+        p2 = np.radians(np.asarray(coords2, dtype=float))
+        lat1, lon1 = p1[..., 0], p1[..., 1]
+        lat2, lon2 = p2[..., 0], p2[..., 1]
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    
+    def distances_to_pois(self, center: Tuple[float, float], pois: POIBatch) -> np.ndarray:
+        """Calculates the distance (in kilometers) from center to every POI in a batch."""
+        return self._distances_from(center[0], center[1], pois.lats, pois.lons)
+    
+    def _distances_from(self, lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Calculates distances from one point to many, with a fused compiled loop when numba is available."""
+        if numba is None:
+            return self.calculate_distance_batch((lat, lon), np.column_stack([lats, lons]))
+        out = np.empty(len(lats))
+        _haversine_nb(lat, lon, lats, lons, out)
+        return out
+    
     def calculate_distance(self, coords1: Tuple[float, float], coords2: Tuple[float, float]) -> float:
         """Calculates the distance between two points (in kilometers)."""
-        return geodesic(coords1, coords2).kilometers
-    
-    def get_nearby_pois(self, lat: float, lon: float, radius: int = 1000) -> List[Dict]:
-        """Retrieves nearby points of interest using OpenStreetMap's Overpass API."""
-        overpass_url = "http://overpass-api.de/api/interpreter"
-        query = f"""
-        [out:json];
-        (
-          node["amenity"](around:{radius},{lat},{lon});
-          way["amenity"](around:{radius},{lat},{lon});
-          relation["amenity"](around:{radius},{lat},{lon});
-        );
-        out center;
-        """
+        return float(self.calculate_distance_batch([coords1], [coords2])[0])
+    
+    @staticmethod
+    def _tile_of(lat: float, lon: float) -> Tuple[int, int]:
+        """Returns the (row, col) index of the POI tile containing a point."""
+        return math.floor(lat / POI_TILE_DEG), math.floor(lon / POI_TILE_DEG)
+    
+    def get_nearby_pois(self, lat: float, lon: float, radius: int = 1000) -> POIBatch:
+        """Retrieves nearby points of interest, mirroring OpenStreetMap tiles into a local R-tree."""
+        # Bounding box of the search circle, using 1 degree of latitude ~ 111 km
+        dlat = radius / 1000 / KM_PER_DEGREE
+        dlon = dlat / max(math.cos(math.radians(lat)), 0.01)
+        min_lat, max_lat = lat - dlat, lat + dlat
+        min_lon, max_lon = lon - dlon, lon + dlon
+        
         try:
-            response = requests.post(overpass_url, data=query)
-            data = response.json()
-            return [
-                {
-                    'type': element.get('tags', {}).get('amenity', 'unknown'),
-                    'name': element.get('tags', {}).get('name', 'unnamed'),
-                    'lat': element.get('lat', element.get('center', {}).get('lat')),
-                    'lon': element.get('lon', element.get('center', {}).get('lon'))
-                }
-                for element in data.get('elements', [])
-                if element.get('tags', {}).get('name')
+            row_min, col_min = self._tile_of(min_lat, min_lon)
+            row_max, col_max = self._tile_of(max_lat, max_lon)
+            tiles = [
+                (row, col)
+                for row in range(row_min, row_max + 1)
+                for col in range(col_min, col_max + 1)
             ]
+            fresh = self.db.get_fresh_poi_tiles([f"{row}:{col}" for row, col in tiles])
+            missing = [(row, col) for row, col in tiles if f"{row}:{col}" not in fresh]
+            if missing:
+                self.db.store_poi_tiles(self._fetch_poi_tiles(missing))
+            rows = self.db.get_pois_in_bbox(min_lat, max_lat, min_lon, max_lon)
+            if not rows:
+                return POIBatch.empty()
+            
+            lats = np.fromiter((row[2] for row in rows), dtype=np.float32, count=len(rows))
+            lons = np.fromiter((row[3] for row in rows), dtype=np.float32, count=len(rows))
+            # Keep POIs inside the radius, nearest first, from a single distance pass
+            distances = self._distances_from(lat, lon, lats, lons)
+            order = np.argsort(distances)
+            keep = order[distances[order] <= radius / 1000]
+            return POIBatch(
+                lats=lats[keep],
+                lons=lons[keep],
+                names=[rows[i][0] for i in keep],
+                types=[rows[i][1] for i in keep],
+                distances=distances[keep]
+            )
         except Exception as e:
             print(f"Error fetching POIs: {str(e)}")
-            return []
+            return POIBatch.empty()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=MAX_POI_TILES)
+    def _overpass_query(south: float, west: float, north: float, east: float) -> bytes:
+        """Builds the encoded Overpass request body for a bounding box.
+        
+        Coordinates are fixed to 5 decimals so the same area always yields
+        byte-identical bodies that HTTP caches can deduplicate.
+        """
+        return OVERPASS_QUERY_TEMPLATE.substitute(
+            south=f"{south:.5f}", west=f"{west:.5f}", north=f"{north:.5f}", east=f"{east:.5f}"
+        ).encode()
+    
+    def _fetch_poi_tiles(self, tiles: List[Tuple[int, int]]) -> Dict[str, List[Dict]]:
+        """Downloads all POIs for the given tiles with a single Overpass query."""
+        query = self._overpass_query(
+            min(row for row, _ in tiles) * POI_TILE_DEG,
+            min(col for _, col in tiles) * POI_TILE_DEG,
+            (max(row for row, _ in tiles) + 1) * POI_TILE_DEG,
+            (max(col for _, col in tiles) + 1) * POI_TILE_DEG
+        )
+        self.overpass_limiter.acquire()
+        with self.http.post(OVERPASS_URL, data=query, timeout=(3, 30), stream=True) as response:
+            response.raise_for_status()
+            # Assign each POI to the tile its coordinates fall in, dropping any outside the requested tiles
+            result = {f"{row}:{col}": [] for row, col in tiles}
+            for poi in self._iter_pois(response):
+                tile_id = "{}:{}".format(*self._tile_of(poi['lat'], poi['lon']))
+                if tile_id in result:
+                    result[tile_id].append(poi)
+        return result
+    
+    @staticmethod
+    def _iter_pois(response: requests.Response):
+        """Yields named POIs from a streamed Overpass response without loading the whole body.
+        
+        Overpass reports timeouts and memory exhaustion as a 200 response with a
+        top-level "remark" and partial elements, so a remark raises instead.
+        """
+        # The raw stream is still gzip-encoded unless asked to decode it
+        response.raw.decode_content = True
+        builder = None
+        for prefix, event, value in ijson.parse(response.raw, use_float=True):
+            if prefix == 'remark':
+                raise Exception(f"Overpass error: {value}")
+            if prefix == 'elements.item' and event == 'start_map':
+                builder = ijson.ObjectBuilder()
+            if builder is None:
+                continue
+            builder.event(event, value)
+            if prefix != 'elements.item' or event != 'end_map':
+                continue
+            element, builder = builder.value, None
+            
+            tags = element.get('tags', {})
+            if 'name' not in tags:
+                continue
+            center = element.get('center', {})
+            poi_lat = element.get('lat', center.get('lat'))
+            poi_lon = element.get('lon', center.get('lon'))
+            if poi_lat is None or poi_lon is None:
+                continue
+            yield {
+                'type': tags.get('amenity', 'unknown'),
+                'name': tags['name'],
+                'lat': poi_lat,
+                'lon': poi_lon
+            }
 
 # -------------------- Map Visualization -------------------- #
 class MapVisualizer:
     """Creates and visualizes maps using Folium."""
     
     @staticmethod
-    def create_map(lat: float, lon: float, pois: List[Dict] = None) -> str:
-        """Creates an interactive map for the given location and points of interest."""
+    def _cache_path(lat: float, lon: float, pois: Optional[POIBatch]) -> str:
+        """Returns the cache file path for a location and its set of POIs."""
+        poi_sig = tuple(sorted(
+            zip(pois.names, pois.types, pois.lats.tolist(), pois.lons.tolist())
+        )) if pois else ()
+        key = hashlib.md5(f"{lat:.4f},{lon:.4f},{poi_sig}".encode()).hexdigest()
+        return os.path.join(MAP_CACHE_DIR, f"{key}.html.gz")
+    
+    @staticmethod
+    def _viewable_copy(cache_file: str, view_dir: str) -> str:
+        """Returns a decompressed copy of a cached map in view_dir, extracting it only if not already present."""
+        html_file = os.path.join(view_dir, os.path.basename(cache_file)[:-len(".gz")])
+        if not os.path.exists(html_file):
+            with gzip.open(cache_file, 'rt', encoding='utf-8') as src:
+                html = src.read()
+            # Write then rename so a concurrent reader never sees a partial file
+            tmp_file = f"{html_file}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as dst:
+                dst.write(html)
+            os.replace(tmp_file, html_file)
+        return html_file
+    
+    @staticmethod
+    def create_map(lat: float, lon: float, pois: Optional[POIBatch] = None, *, view_dir: str) -> str:
+        """Creates an interactive map for the given location and points of interest.
+        
+        Maps are cached gzipped; the returned path is a decompressed copy in
+        view_dir, a private directory owned by the caller.
+        """
+        # Reuse a previously rendered map for the same location and POIs
+        cache_file = MapVisualizer._cache_path(lat, lon, pois)
+        try:
+            os.utime(cache_file)  # Mark as recently used for eviction
+            return MapVisualizer._viewable_copy(cache_file, view_dir)
+        except FileNotFoundError:
+            pass
+        
         m = folium.Map(location=[lat, lon], zoom_start=15)
         
         # Add marker for the main location
@@ -127,20 +771,41 @@ class MapVisualizer:
             icon=folium.Icon(color='red', icon='info-sign')
         ).add_to(m)
         
-        # Add markers for nearby POIs if provided
+        # Add nearby POIs as one clustered layer instead of a marker per POI
         if pois:
-            for poi in pois:
-                if poi.get('lat') and poi.get('lon'):
-                    folium.Marker(
-                        [poi['lat'], poi['lon']],
-                        popup=f"{poi['name']} ({poi['type']})",
-                        icon=folium.Icon(color='blue', icon='info-sign')
-                    ).add_to(m)
-        
-        # Save map to a temporary HTML file
-        map_file = "temp_map.html"
-        m.save(map_file)
-        return map_file
+            data = [
+                [poi_lat, poi_lon, f"{name} ({poi_type})"]
+                for poi_lat, poi_lon, name, poi_type in zip(
+                    pois.lats.tolist(), pois.lons.tolist(), pois.names, pois.types
+                )
+            ]
+            FastMarkerCluster(data, callback=POI_MARKER_CALLBACK).add_to(m)
+        
+        # Save the compressed map to the cache directory
+        os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+        tmp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+            f.write(m.get_root().render())
+        os.replace(tmp_file, cache_file)
+        MapVisualizer._prune_cache()
+        return MapVisualizer._viewable_copy(cache_file, view_dir)
+    
+    @staticmethod
+    def _prune_cache():
+        """Deletes the least recently used cached maps beyond MAX_CACHED_MAPS."""
+        entries = []
+        for entry in os.scandir(MAP_CACHE_DIR):
+            if entry.name.endswith(".html.gz"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        entries.sort(reverse=True)
+        for _, path in entries[MAX_CACHED_MAPS:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
 
 # -------------------- Application GUI -------------------- #
 class GeolocationApp(tk.Tk):
@@ -166,8 +831,64 @@ class GeolocationApp(tk.Tk):
         style.map("TButton", foreground=[("active", "black"), ("!active", "white")])
         
         self.geo_service = GeolocationService()
+        # Network calls run here so Tk callbacks never block on a round-trip
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self._closing = False
+        # Private, per-session directory for the decompressed maps handed to the browser
+        self.map_view_dir = tempfile.mkdtemp(prefix="geolocation_maps_")
+        # Pending debounced calls, one per handler so different actions never cancel each other
+        self._pending_jobs: Dict[Callable, str] = {}
         self.setup_ui()
     
+    def on_close(self):
+        """Stops background work and closes the window."""
+        # Tasks already running cannot be stopped; this makes their results get dropped
+        self._closing = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.geo_service.close()
+        shutil.rmtree(self.map_view_dir, ignore_errors=True)
+        self.destroy()
+    
+    def debounce(self, func: Callable):
+        """Schedules func after DEBOUNCE_MS of inactivity, replacing a pending call to the same func."""
+        pending = self._pending_jobs.get(func)
+        if pending:
+            self.after_cancel(pending)
+        self._pending_jobs[func] = self.after(DEBOUNCE_MS, self._run_debounced, func)
+    
+    def _run_debounced(self, func: Callable):
+        """Runs a debounced call once its quiet period has elapsed."""
+        self._pending_jobs.pop(func, None)
+        func()
+    
+    def run_in_background(self, callback, func, *args):
+        """Runs func on the executor and hands its result to callback on the Tk thread."""
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(lambda f: self._schedule_result(f, callback))
+        return future
+    
+    def _schedule_result(self, future: concurrent.futures.Future, callback):
+        """Hands a finished future to the Tk thread, unless the window is closing."""
+        if self._closing:
+            return
+        try:
+            self.after(0, self._apply_result, future, callback)
+        except (RuntimeError, tk.TclError):
+            # The window was destroyed between the check and the call
+            pass
+    
+    def _apply_result(self, future: concurrent.futures.Future, callback):
+        """Delivers a finished background result, reporting any error it raised."""
+        if self._closing or future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        callback(result)
+    
     def setup_ui(self):
         """Sets up the UI components."""
         # Create a notebook (tabbed interface)
@@ -199,19 +920,19 @@ class GeolocationApp(tk.Tk):
         ttk.Button(
             button_frame,
             text="Geocode",
-            command=self.handle_geocoding
+            command=lambda: self.debounce(self.handle_geocoding)
         ).pack(side='left', padx=5)
         
         ttk.Button(
             button_frame,
             text="Reverse Geocode",
-            command=self.handle_reverse_geocoding
+            command=lambda: self.debounce(self.handle_reverse_geocoding)
         ).pack(side='left', padx=5)
         
         ttk.Button(
             button_frame,
             text="Show on Map",
-            command=self.show_map
+            command=lambda: self.debounce(self.show_map)
         ).pack(side='left', padx=5)
         
         # Text widget to display results with a custom background and font
@@ -238,7 +959,7 @@ class GeolocationApp(tk.Tk):
         ttk.Button(
             frame,
             text="Calculate Distance",
-            command=self.calculate_distance
+            command=lambda: self.debounce(self.calculate_distance)
         ).pack(pady=10)
         
         # Label to display the calculated distance
@@ -251,9 +972,24 @@ class GeolocationApp(tk.Tk):
         """Creates the search history tab interface."""
         frame = ttk.Frame(self)
         
-        # Text widget to display search history
-        self.history_text = tk.Text(frame, height=20, width=50, bg="#E1F5FE", fg="black", font=("Helvetica", 11))
-        self.history_text.pack(pady=10)
+        # Table of past searches, loaded a page at a time as the user scrolls
+        tree_frame = ttk.Frame(frame)
+        tree_frame.pack(fill='both', expand=True, pady=10)
+        
+        self.history_tree = ttk.Treeview(tree_frame, columns=('query', 'result', 'time'), show='headings', height=20)
+        self.history_tree.heading('query', text="Query")
+        self.history_tree.heading('result', text="Result")
+        self.history_tree.heading('time', text="Time")
+        self.history_tree.column('time', width=150, stretch=False)
+        
+        self.history_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=self._on_history_scroll)
+        self.history_scrollbar.pack(side='right', fill='y')
+        self.history_tree.pack(side='left', fill='both', expand=True)
+        
+        # (timestamp, id) of the last row shown, where the next page starts
+        self._history_cursor = None
+        self._history_exhausted = False
         
         # Refresh history button
         ttk.Button(
@@ -267,85 +1003,108 @@ class GeolocationApp(tk.Tk):
     def handle_geocoding(self):
         """Handles the Geocode button click."""
         address = self.address_entry.get().strip()
-        try:
-            coords = self.geo_service.geocode(address)
-            if coords:
-                self.result_text.delete(1.0, tk.END)
-                self.result_text.insert(
-                    tk.END,
-                    f"Coordinates: {coords[0]}, {coords[1]}\n"
-                )
-            else:
-                messagebox.showerror("Error", "Location not found")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.run_in_background(self._apply_geocode_result, self.geo_service.geocode, address)
+    
+    def _apply_geocode_result(self, coords: Optional[Tuple[float, float]]):
+        """Displays the result of a geocoding request."""
+        if coords:
+            self.result_text.delete(1.0, tk.END)
+            self.result_text.insert(
+                tk.END,
+                f"Coordinates: {coords[0]}, {coords[1]}\n"
+            )
+        else:
+            messagebox.showerror("Error", "Location not found")
     
     def handle_reverse_geocoding(self):
         """Handles the Reverse Geocode button click."""
-        try:
-            coords = self.address_entry.get().strip().split(',')
-            if len(coords) != 2:
-                raise ValueError("Invalid coordinate format. Please use 'latitude,longitude'")
-            
-            lat, lon = float(coords[0]), float(coords[1])
-            address = self.geo_service.reverse_geocode(lat, lon)
-            
-            if address:
-                self.result_text.delete(1.0, tk.END)
-                self.result_text.insert(tk.END, f"Address: {address}\n")
-            else:
-                messagebox.showerror("Error", "Address not found")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        match = COORDINATE_RE.match(self.address_entry.get())
+        if not match:
+            messagebox.showerror("Error", "Invalid coordinate format. Please use 'latitude,longitude'")
+            return
+        
+        lat, lon = float(match.group(1)), float(match.group(2))
+        self.run_in_background(self._apply_reverse_geocode_result, self.geo_service.reverse_geocode, lat, lon)
+    
+    def _apply_reverse_geocode_result(self, address: Optional[str]):
+        """Displays the result of a reverse geocoding request."""
+        if address:
+            self.result_text.delete(1.0, tk.END)
+            self.result_text.insert(tk.END, f"Address: {address}\n")
+        else:
+            messagebox.showerror("Error", "Address not found")
     
     def show_map(self):
         """Handles the Show on Map button click."""
-        try:
-            # First, try to geocode the input
-            address = self.address_entry.get().strip()
-            coords = self.geo_service.geocode(address)
-            
-            if coords:
-                # Retrieve nearby points of interest
-                pois = self.geo_service.get_nearby_pois(coords[0], coords[1])
-                
-                # Create and display the map
-                map_file = MapVisualizer.create_map(coords[0], coords[1], pois)
-                webbrowser.open('file://' + os.path.realpath(map_file))
-            else:
-                messagebox.showerror("Error", "Location not found")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        address = self.address_entry.get().strip()
+        self.run_in_background(self._apply_map_result, self._build_map, address)
+    
+    def _build_map(self, address: str) -> Optional[str]:
+        """Geocodes the address and renders a map with nearby POIs (runs off the Tk thread)."""
+        # First, try to geocode the input
+        coords = self.geo_service.geocode(address)
+        if not coords:
+            return None
+        
+        # Retrieve nearby points of interest
+        pois = self.geo_service.get_nearby_pois(coords[0], coords[1])
+        
+        # Create the map
+        return MapVisualizer.create_map(coords[0], coords[1], pois, view_dir=self.map_view_dir)
+    
+    def _apply_map_result(self, map_file: Optional[str]):
+        """Opens a rendered map in the browser."""
+        if map_file:
+            webbrowser.open('file://' + os.path.realpath(map_file))
+        else:
+            messagebox.showerror("Error", "Location not found")
     
     def calculate_distance(self):
         """Handles the Calculate Distance button click."""
-        try:
-            # Geocode both locations
-            coords1 = self.geo_service.geocode(self.loc1_entry.get().strip())
-            coords2 = self.geo_service.geocode(self.loc2_entry.get().strip())
-            
-            if coords1 and coords2:
-                distance = self.geo_service.calculate_distance(coords1, coords2)
-                self.distance_result.config(
-                    text=f"Distance: {distance:.2f} km"
-                )
-            else:
-                messagebox.showerror("Error", "One or both locations not found")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        # Geocode both locations in one batch
+        addresses = [self.loc1_entry.get().strip(), self.loc2_entry.get().strip()]
+        self.run_in_background(self._apply_distance_result, self.geo_service.geocode_many, addresses)
+    
+    def _apply_distance_result(self, coords: List[Optional[Tuple[float, float]]]):
+        """Displays the distance between two geocoded locations."""
+        coords1, coords2 = coords
+        if coords1 and coords2:
+            distance = self.geo_service.calculate_distance(coords1, coords2)
+            self.distance_result.config(
+                text=f"Distance: {distance:.2f} km"
+            )
+        else:
+            messagebox.showerror("Error", "One or both locations not found")
     
     def refresh_history(self):
         """Refreshes and displays the search history."""
+        self.history_tree.delete(*self.history_tree.get_children())
+        self._history_cursor = None
+        self._history_exhausted = False
+        self.load_history_page()
+    
+    def load_history_page(self):
+        """Appends the next page of search history to the table."""
         try:
-            searches = self.geo_service.db.get_recent_searches()
-            self.history_text.delete(1.0, tk.END)
-            for query, result, timestamp in searches:
-                self.history_text.insert(
-                    tk.END,
-                    f"Query: {query}\nResult: {result}\nTime: {timestamp}\n\n"
-                )
+            searches = self.geo_service.db.get_recent_searches(
+                limit=HISTORY_PAGE_SIZE, before=self._history_cursor
+            )
         except Exception as e:
+            self._history_exhausted = True
             messagebox.showerror("Error", f"Error loading history: {str(e)}")
+            return
+        for query, result, timestamp, _, _, _ in searches:
+            self.history_tree.insert('', tk.END, values=(query, result, timestamp))
+        if searches:
+            self._history_cursor = (searches[-1][2], searches[-1][5])
+        if len(searches) < HISTORY_PAGE_SIZE:
+            self._history_exhausted = True
+    
+    def _on_history_scroll(self, first: str, last: str):
+        """Updates the scrollbar and loads more history when the view nears the bottom."""
+        self.history_scrollbar.set(first, last)
+        if float(last) >= 0.9 and not self._history_exhausted:
+            self.load_history_page()
 
 def main():
     """Application entry point."""